@@ -1,13 +1,61 @@
+import asyncio
+import logging
+import re
+import socket
+import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Final
+
+try:
+    # orjson parses the small per-frame SSE JSON objects 2-4x faster than
+    # stdlib json and accepts bytes directly.
+    import orjson
+except ImportError:
+    import json as orjson
+
+try:
+    import aiohttp
+except ImportError:
+    # aiohttp is optional; without it chat() falls back to the blocking requests path.
+    aiohttp = None
+
+try:
+    from slack_sdk.errors import SlackApiError
+except ImportError:
+    SlackApiError = None
 
 from cortex_response_parser import CortexResponseParser
 
-DEBUG = False  # Set to True for detailed logging
+DEBUG: Final = False  # Set to True for detailed logging
+
+logger = logging.getLogger(__name__)
+
+
+class _LowLatencyAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter that disables Nagle's algorithm on pooled sockets.
+
+    Nagle can delay small writes (like SSE frames and our POST body) by up to
+    ~40 ms waiting for ACK coalescing; TCP keep-alive guards the long-lived
+    streaming connection.
+    """
+    _SOCKET_OPTIONS = [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self._SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
 
 class CortexChat:
-    def __init__(self, 
-            agent_url: str, 
+    # One aiohttp session per event loop so concurrent chats on the same loop
+    # share pooled keep-alive connections to the agent endpoint.
+    _aio_sessions = {}
+
+    def __init__(self,
+            agent_url: str,
             pat: str,
             slack_say_function=None,
             slack_app=None
@@ -17,18 +65,63 @@ class CortexChat:
         self.parser = CortexResponseParser(debug=DEBUG)
         self.slack_say = slack_say_function  # For real-time Slack updates
         self.slack_app = slack_app  # For updating messages
+        self._slack_update_headers = None  # Set once the bot token is known
+        self._channel_id = None  # Cached by set_slack_app; read per stream, not per event
+        self._prepare_slack_update_headers()
+        # Debounce state for in-stream chat_update calls (Slack allows ~1 req/sec/channel)
+        self._last_update_ts = 0.0
+        self._pending_update = None
+        # Single worker so Slack round-trips happen off the SSE reader while
+        # updates still arrive in order (last write wins).
+        self._slack_executor = ThreadPoolExecutor(max_workers=1)
 
-    def _retrieve_response(self, query: str, limit=1) -> dict[str, any]:
-        """Enhanced response retrieval with real-time streaming and planning display."""
+        # Reusable Slack block templates for in-stream updates: only the text
+        # changes per SSE event, so mutate it in place instead of rebuilding the
+        # nested block dicts every time. The update worker always sends the
+        # newest text, which matches the coalescing (last write wins) semantics.
+        self._section_block = {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": None
+            }
+        }
+        self._section_blocks = [self._section_block]
+        self._planning_blocks = [
+            self._section_block,
+            {
+                "type": "actions",
+                "elements": [
+                    {
+                        "type": "button",
+                        "text": {
+                            "type": "plain_text",
+                            "text": "📋 Show Details"
+                        },
+                        "action_id": "show_planning_details",
+                        "value": "show"
+                    }
+                ]
+            }
+        ]
+
+        # Shared session so repeated queries reuse one TCP+TLS connection to the
+        # agent endpoint instead of paying a fresh handshake per request.
+        self._session = requests.Session()
+        adapter = _LowLatencyAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
 
-        payload = {
+        # The request payload has a fixed shape; only the user text changes per
+        # query, so build the dict once and patch the text slot in _build_payload.
+        self._payload_template = {
             "messages": [
             {
                 "role": "user",
                 "content": [
                     {
                         "type": "text",
-                        "text": query
+                        "text": None
                     }
                 ]
             }
@@ -38,518 +131,710 @@ class CortexChat:
             },
             "stream": True  # Enable streaming as expected by the API
         }
+        self._payload_text_slot = self._payload_template["messages"][0]["content"][0]
 
-        headers = {
+        # The headers never change for the lifetime of this object, so build them once.
+        self._headers = {
             "X-Snowflake-Authorization-Token-Type": "PROGRAMMATIC_ACCESS_TOKEN",
             "Authorization": f"Bearer {self.pat}",
             "Content-Type": "application/json",
-            "Accept": "application/json"
+            # Advertise SSE so intermediaries don't buffer the stream on us
+            "Accept": "text/event-stream",
+            "Connection": "keep-alive"
         }
-        
-        # Debug: Print the request details
-        if DEBUG:
-            print(f"🔍 Making request to: {self.agent_url}")
-            print(f"🔍 Headers: {headers}")
-            print(f"🔍 Payload: {json.dumps(payload, indent=2)}")
 
+    def close(self):
+        """Close the pooled HTTP session and stop the Slack update worker."""
+        self._session.close()
+        self._slack_executor.shutdown(wait=False)
+
+    def __del__(self):
         try:
-            # Make streaming request
-            response = requests.post(
-                self.agent_url,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=120,
-                stream=True
-            )
-            response.raise_for_status()
-            
-            # Send initial planning status to Slack with collapsible button interface
-            self.planning_message_ts = None
-            self.planning_channel = getattr(self.slack_app, '_channel_id', None) if self.slack_app else None
-            planning_expanded = False  # Track whether details are shown
-            if self.slack_say:
-                result = self.slack_say(
-                    text="🤔 Thinking...",
-                    blocks=[
-                        {
-                            "type": "section",
-                            "text": {
-                                "type": "mrkdwn",
-                                "text": "*🤔 Thinking...*"
-                            }
+            self.close()
+        except Exception:
+            pass
+
+    def _build_payload(self, query: str) -> dict:
+        """Fill the user query into the reusable payload template.
+
+        Only the text varies between requests; callers serialize the result
+        immediately, so reusing one template instance is safe.
+        """
+        self._payload_text_slot["text"] = query
+        return self._payload_template
+
+    def _build_headers(self) -> dict:
+        """Return the authentication headers for the agent request."""
+        return self._headers
+
+    def _begin_stream(self) -> dict:
+        """Send the initial planning message to Slack and set up streaming state."""
+        # Send initial planning status to Slack with collapsible button interface
+        self.planning_message_ts = None
+        self.planning_channel = self._channel_id if self.slack_app else None
+        if self.slack_say:
+            result = self.slack_say(
+                text="🤔 Thinking...",
+                blocks=[
+                    {
+                        "type": "section",
+                        "text": {
+                            "type": "mrkdwn",
+                            "text": "*🤔 Thinking...*"
                         }
-                    ]
-                )
-                # Store message timestamp for updates if available
-                if hasattr(result, 'get') and result.get('ts'):
-                    self.planning_message_ts = result['ts']
-            
-            # Collect streaming response with real-time display
-            response_lines = []
-            tools_used = []
-            current_thinking = ""
-            planning_updates = []
-            thinking_updates = []  # Track thinking content for Slack updates
-            timeline = []  # Chronological timeline of status and thinking events
-            
-            if DEBUG:
-                print("\n🤖 AGENT PLANNING & EXECUTION:")
-                print("="*50)
-
-            line_count = 0
-            current_event = None
-            for line in response.iter_lines():
-                line_count += 1
-                if line:
-                    line_decoded = line.decode('utf-8')
-                    response_lines.append(line_decoded)
-                    
-                    # Check for event type first
-                    if line_decoded.startswith('event: '):
-                        current_event = line_decoded[7:].strip()
+                    }
+                ]
+            )
+            # Store message timestamp for updates if available
+            if hasattr(result, 'get') and result.get('ts'):
+                self.planning_message_ts = result['ts']
+
+        if DEBUG:
+            print("\n🤖 AGENT PLANNING & EXECUTION:")
+            print("="*50)
+
+        # Reset the update debounce so a previous query's pending update can't leak
+        self._last_update_ts = 0.0
+        self._pending_update = None
+
+        # Collect streaming response with real-time display
+        return {
+            'parser_stream': self.parser.begin_sse_stream(),
+            'saw_sse': False,
+            'json_fallback_lines': [],  # Only filled while no SSE frame has been seen
+            'tools_used': set(),  # Only membership checks; a set keeps them O(1)
+            'current_thinking_parts': [],
+            'current_thinking_len': 0,
+            'planning_updates': [],
+            'thinking_updates': [],  # Track thinking content for Slack updates
+            'timeline': [],  # Chronological timeline of status and thinking events
+            'line_count': 0,
+            'current_event': None,
+            'event_handler': CortexChat._on_other_event,
+        }
+
+    # Minimum spacing between in-stream chat_update calls. Slack recommends at most
+    # ~1 request/sec/channel; bursty agents can emit status events far faster.
+    _UPDATE_INTERVAL = 1.0
+
+    def _post_slack_update(self, **kwargs):
+        """Queue a chat_update to Slack, coalescing bursts to at most one per second.
+
+        Intermediate updates are dropped in favor of the newest one; the final
+        state is always delivered by _flush_slack_update at the end of the stream.
+        """
+        self._pending_update = kwargs
+        if time.monotonic() - self._last_update_ts < self._UPDATE_INTERVAL:
+            return
+        self._flush_slack_update()
+
+    def _flush_slack_update(self):
+        """Hand the most recent pending chat_update to the background worker.
+
+        Returns the submitted future (or None if nothing was pending) so
+        callers that must order a direct write after the worker's queue can
+        wait on it.
+        """
+        kwargs = self._pending_update
+        if kwargs is None:
+            return None
+        self._pending_update = None
+        self._last_update_ts = time.monotonic()
+        return self._slack_executor.submit(self._do_slack_update, kwargs)
+
+    # Slack's Web API endpoint for message updates, hit directly from the worker
+    _SLACK_UPDATE_URL = "https://slack.com/api/chat.update"
+
+    def _prepare_slack_update_headers(self):
+        """Cache the static headers for raw chat.update posts, if a token is available."""
+        token = getattr(getattr(self.slack_app, 'client', None), 'token', None)
+        if token:
+            self._slack_update_headers = {
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json; charset=utf-8",
+            }
+
+    # Retry policy for rate-limited updates: honor Slack's Retry-After, capped
+    # so a worker never sleeps away the whole stream.
+    _SLACK_MAX_RETRIES = 2
+    _SLACK_MAX_RETRY_AFTER = 5.0
+
+    def _sleep_retry_after(self, retry_after):
+        """Sleep for Slack's advertised Retry-After (seconds), capped and defaulted."""
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = 1.0
+        time.sleep(min(delay, self._SLACK_MAX_RETRY_AFTER))
+
+    def _do_slack_update(self, kwargs):
+        """Send one chat_update from the worker thread; errors are logged, not raised.
+
+        The update body has a known shape, so when the bot token is available it
+        is encoded once with orjson and posted on the pooled keep-alive session,
+        skipping slack_sdk's per-call validation and connection setup. Any
+        failure falls back to the SDK client. Rate-limited responses (429) are
+        retried after Slack's Retry-After interval instead of being dropped.
+        """
+        for attempt in range(self._SLACK_MAX_RETRIES + 1):
+            try:
+                headers = self._slack_update_headers
+                if headers is not None:
+                    resp = self._session.post(
+                        self._SLACK_UPDATE_URL,
+                        data=orjson.dumps(kwargs),
+                        headers=headers,
+                        timeout=10,
+                    )
+                    if resp.ok and resp.json().get("ok"):
+                        return
+                    if resp.status_code == 429 and attempt < self._SLACK_MAX_RETRIES:
+                        self._sleep_retry_after(resp.headers.get('Retry-After'))
                         continue
-                        
-                    if line_decoded.startswith('data: '):
-                        data_content = line_decoded[6:].strip()
-                        
-                        if data_content == '[DONE]':
-                            if DEBUG:
-                                print("\n✅ AGENT PROCESSING COMPLETE")
+                    logger.debug("Raw chat.update failed (%s), falling back to SDK", resp.status_code)
+                self.slack_app.client.chat_update(**kwargs)
+                return
+            except Exception as e:
+                if (SlackApiError is not None and isinstance(e, SlackApiError)
+                        and e.response is not None and attempt < self._SLACK_MAX_RETRIES):
+                    self._sleep_retry_after(e.response.headers.get('Retry-After'))
+                    continue
+                logger.warning("❌ Error updating Slack message: %s", e)
+                return
+
+    def _handle_text_delta(self, content_item, state: dict):
+        """Handle a 'text' content item from a message.delta frame."""
+        text_delta = content_item.get('text', '')
+        if text_delta:
+            # Append parts and track the running length; repeated str += would be
+            # O(N^2) over a long streamed answer. Join only if a consumer ever
+            # needs the full text.
+            state['current_thinking_parts'].append(text_delta)
+            state['current_thinking_len'] += len(text_delta)
+            # Only show first part as thinking
+            if DEBUG and state['current_thinking_len'] < 200:
+                print(f"🧠 {text_delta}", end='', flush=True)
+
+    def _handle_tool_use_delta(self, content_item, state: dict):
+        """Handle a 'tool_use' content item from a message.delta frame."""
+        tool_data = content_item.get('tool_use', {})
+        tool_name = tool_data.get('name', 'unknown')
+        if tool_name not in state['tools_used']:
+            state['tools_used'].add(tool_name)
+            if DEBUG:
+                print(f"\n🔧 USING TOOL: {tool_name}")
+            state['planning_updates'].append(f"Using {tool_name}")
+            state['timeline'].append({'type': 'status', 'content': f"Using {tool_name}"})
+
+            # Show tool parameters if available (debug only)
+            if DEBUG and 'input' in tool_data:
+                tool_input = tool_data['input']
+                if isinstance(tool_input, dict):
+                    for key, value in tool_input.items():
+                        if isinstance(value, str) and len(value) < 100:
+                            print(f"   📝 {key}: {value}")
+
+    def _handle_tool_result_delta(self, content_item, state: dict):
+        """Handle a 'tool_result' content item from a message.delta frame (debug logging only)."""
+        print(f"✅ Tool execution completed")
+
+        # Check for verification information in tool result
+        tool_result = content_item.get('tool_result', {})
+        if tool_result:
+            # Check for verification fields
+            if 'verification' in tool_result:
+                print(f"   🔍 Verification: {tool_result['verification']}")
+            if 'validated' in tool_result:
+                print(f"   ✅ Validated: {tool_result['validated']}")
+            if 'query_verified' in tool_result:
+                print(f"   🎯 Query Verified: {tool_result['query_verified']}")
+            if 'verified_query_used' in tool_result:
+                print(f"   ✅ Verified Query Used: {tool_result['verified_query_used']}")
+            if 'query_validation' in tool_result:
+                print(f"   📋 Query Validation: {tool_result['query_validation']}")
+
+            # Also check nested JSON content
+            if isinstance(tool_result, dict) and 'json' in tool_result:
+                json_data = tool_result['json']
+                if 'verification' in json_data:
+                    print(f"   🔍 JSON Verification: {json_data['verification']}")
+                if 'validated' in json_data:
+                    print(f"   ✅ JSON Validated: {json_data['validated']}")
+                if 'query_verified' in json_data:
+                    print(f"   🎯 JSON Query Verified: {json_data['query_verified']}")
+                if 'verified_query_used' in json_data:
+                    print(f"   ✅ JSON Verified Query Used: {json_data['verified_query_used']}")
+
+    # Dispatch table for message.delta content items: one dict lookup per item
+    # instead of a chain of type comparisons in the hot loop. The tool_result
+    # handler only produces debug logging, so it is registered (and its flag
+    # checks paid) only when DEBUG is on.
+    _DELTA_HANDLERS = {
+        'text': _handle_text_delta,
+        'tool_use': _handle_tool_use_delta,
+    }
+    if DEBUG:
+        _DELTA_HANDLERS['tool_result'] = _handle_tool_result_delta
+
+    def _on_status_event(self, json_data, state: dict):
+        """Handle a response.status frame (planning steps)."""
+        if 'message' not in json_data:
+            return
+        planning_updates = state['planning_updates']
+        status_msg = json_data['message']
+        # Lazy %s formatting: no string is built unless the level is enabled
+        logger.debug("🔹 STATUS: %s", status_msg)
+
+        # Add all planning steps to the details (now that header is "Thinking")
+        planning_updates.append(status_msg)
+        state['timeline'].append({'type': 'status', 'content': status_msg})
+
+        # Update Slack in real-time for planning steps (keep collapsed by default)
+        if self.slack_app and self.planning_message_ts and self.planning_channel:
+            try:
+                step_count = len(planning_updates)
+                latest_step = planning_updates[-1] if planning_updates else "Processing..."
+
+                # Show summary with step count and latest step (no button while thinking)
+                self._section_block["text"]["text"] = f"*🤔 Thinking...*\n\n_Latest: {latest_step}_"
+
+                self._post_slack_update(
+                    channel=self.planning_channel,
+                    ts=self.planning_message_ts,
+                    blocks=self._section_blocks
+                )
+                logger.debug("⚡ Updated planning: %s steps", step_count)
+            except Exception as e:
+                logger.warning("❌ Error updating planning message: %s", e)
+                if DEBUG:
+                    import traceback
+                    print(f"❌ Full error: {traceback.format_exc()}")
+
+    def _on_thinking_delta_event(self, json_data, state: dict):
+        """Handle a response.thinking.delta frame (real-time thinking content)."""
+        if 'text' not in json_data:
+            return
+        planning_updates = state['planning_updates']
+        thinking_updates = state['thinking_updates']
+        timeline = state['timeline']
+
+        thinking_text = json_data['text']
+        # Extract content from <thinking> tags and print without tags
+        thinking_match = re.search(r'<thinking>(.*?)</thinking>', thinking_text, re.DOTALL)
+        if thinking_match:
+            clean_thinking = thinking_match.group(1).strip()
+            if clean_thinking:
+                logger.debug("THINKING COMPLETE: %s", clean_thinking)
+                # Replace the last thinking update with complete version
+                if thinking_updates:
+                    thinking_updates[-1] = clean_thinking
+                    # Update timeline entry if it exists
+                    for i in range(len(timeline) - 1, -1, -1):
+                        if timeline[i]['type'] == 'thinking':
+                            timeline[i]['content'] = clean_thinking.strip()
                             break
-                        elif not data_content.startswith('['):
+                else:
+                    thinking_updates.append(clean_thinking)
+                    timeline.append({'type': 'thinking', 'content': clean_thinking.strip()})
+                self._update_slack_with_thinking(planning_updates, thinking_updates)
+        else:
+            # Handle streaming text fragments (preserve spacing from API)
+            clean_text = thinking_text.replace('<thinking>', '').replace('</thinking>', '')
+            if clean_text:
+                # Check content_index to handle multiple thinking streams
+                content_index = json_data.get('content_index', 0)
+
+                # Ensure we have enough thinking slots
+                while len(thinking_updates) <= content_index:
+                    thinking_updates.append("")
+
+                # For streaming, log the text fragments directly
+                if not thinking_updates[content_index]:
+                    logger.debug("THINKING: %s", clean_text)
+                    # Add new thinking entry to timeline (strip leading/trailing whitespace)
+                    timeline.append({'type': 'thinking', 'content': clean_text.strip(), 'content_index': content_index})
+                else:
+                    logger.debug("%s", clean_text)
+
+                # Accumulate text exactly as provided by the API (spacing is correct)
+                thinking_updates[content_index] += clean_text
+
+                # Update the timeline entry for this content_index
+                for i in range(len(timeline) - 1, -1, -1):
+                    if (timeline[i]['type'] == 'thinking' and
+                        timeline[i].get('content_index') == content_index):
+                        timeline[i]['content'] = thinking_updates[content_index].strip()
+                        break
+
+                self._update_slack_with_thinking(planning_updates, thinking_updates)
+
+    def _on_thinking_event(self, json_data, state: dict):
+        """Handle a complete response.thinking frame."""
+        if 'text' not in json_data:
+            return
+        thinking_updates = state['thinking_updates']
+        timeline = state['timeline']
+
+        thinking_text = json_data['text']
+        # Extract content from <thinking> tags
+        thinking_match = re.search(r'<thinking>(.*?)</thinking>', thinking_text, re.DOTALL)
+        if thinking_match:
+            clean_thinking = thinking_match.group(1).strip()
+            if clean_thinking:
+                logger.debug("THINKING COMPLETE: %s", clean_thinking)
+                # Use content_index to place in correct slot
+                content_index = json_data.get('content_index', 0)
+
+                # Ensure we have enough thinking slots
+                while len(thinking_updates) <= content_index:
+                    thinking_updates.append("")
+
+                # Replace the content at the correct index
+                thinking_updates[content_index] = clean_thinking
+
+                # Update or add to timeline
+                timeline_updated = False
+                for i in range(len(timeline) - 1, -1, -1):
+                    if (timeline[i]['type'] == 'thinking' and
+                        timeline[i].get('content_index') == content_index):
+                        timeline[i]['content'] = clean_thinking.strip()
+                        timeline_updated = True
+                        break
+
+                if not timeline_updated:
+                    timeline.append({'type': 'thinking', 'content': clean_thinking.strip(), 'content_index': content_index})
+
+                self._update_slack_with_thinking(state['planning_updates'], thinking_updates)
+
+    def _on_response_event(self, json_data, state: dict):
+        """Handle the final response event (new format)."""
+        logger.debug("🎯 FINAL RESPONSE EVENT: Found final response data")
+
+    def _on_other_event(self, json_data, state: dict):
+        """Handle frames without a dedicated event handler (deltas, untyped objects)."""
+        planning_updates = state['planning_updates']
+
+        # Handle message deltas (streaming content)
+        if json_data.get('object') == 'message.delta':
+            delta = json_data.get('delta', {})
+
+            # Display thinking/planning text as it streams
+            # Note: response.text.delta contains the final answer delta with SQL results already included
+            if 'content' in delta:
+                handlers = self._DELTA_HANDLERS
+                for content_item in delta['content']:
+                    handler = handlers.get(content_item.get('type'))
+                    if handler is not None:
+                        handler(self, content_item, state)
+
+        # Handle objects without explicit type (status updates, tool metadata)
+        elif json_data.get('object') is None:
+            if 'status' in json_data:
+                status = json_data.get('status', '')
+                status_msg = json_data.get('status_message', '')
+                if status and status not in ['REASONING_AGENT_STOP']:  # Filter noise
+                    if DEBUG:
+                        print(f"\n🔹 STATUS: {status.replace('_', ' ').title()}")
+                        if status_msg:
+                            print(f"   📝 {status_msg}")
+
+                    # Always append status messages for Slack updates (regardless of DEBUG)
+                    if status_msg:
+                        planning_updates.append(status_msg)
+                        state['timeline'].append({'type': 'status', 'content': status_msg})
+
+                        # Update planning message with new steps (keep collapsed by default)
+                        if self.slack_app and self.planning_message_ts and len(planning_updates) % 2 == 0:  # Every 2nd update
                             try:
-                                json_data = json.loads(data_content)
-                                
-                                # Handle status events (planning steps)
-                                if current_event == 'response.status':
-                                    if 'message' in json_data:
-                                        status_msg = json_data['message']
-                                        print(f"🔹 STATUS: {status_msg}")
-                                        
-                                        # Add all planning steps to the details (now that header is "Thinking")
-                                        planning_updates.append(status_msg)
-                                        timeline.append({'type': 'status', 'content': status_msg})
-                                        
-                                        # Update Slack in real-time for planning steps (keep collapsed by default)
-                                        if self.slack_app and self.planning_message_ts and self.planning_channel:
-                                            try:
-                                                step_count = len(planning_updates)
-                                                latest_step = planning_updates[-1] if planning_updates else "Processing..."
-                                                
-                                                # Show summary with step count and latest step (no button while thinking)
-                                                summary_text = f"*🤔 Thinking...*\n\n_Latest: {latest_step}_"
-                                                
-                                                blocks = [
-                                                    {
-                                                        "type": "section",
-                                                        "text": {
-                                                            "type": "mrkdwn",
-                                                            "text": summary_text
-                                                        }
-                                                    }
-                                                ]
-                                                
-                                                self.slack_app.client.chat_update(
-                                                    channel=self.planning_channel,
-                                                    ts=self.planning_message_ts,
-                                                    blocks=blocks
-                                                )
-                                                print(f"⚡ Updated planning: {step_count} steps")
-                                            except Exception as e:
-                                                print(f"❌ Error updating planning message: {e}")
-                                                if DEBUG:
-                                                    import traceback
-                                                    print(f"❌ Full error: {traceback.format_exc()}")
-                                    continue
-                                
-                                # Handle thinking events (real-time thinking content)
-                                elif current_event == 'response.thinking.delta':
-                                    if 'text' in json_data:
-                                        thinking_text = json_data['text']
-                                        # Extract content from <thinking> tags and print without tags
-                                        import re
-                                        thinking_match = re.search(r'<thinking>(.*?)</thinking>', thinking_text, re.DOTALL)
-                                        if thinking_match:
-                                            clean_thinking = thinking_match.group(1).strip()
-                                            if clean_thinking:
-                                                print(f"THINKING COMPLETE: {clean_thinking}")
-                                                # Replace the last thinking update with complete version
-                                                if thinking_updates:
-                                                    thinking_updates[-1] = clean_thinking
-                                                    # Update timeline entry if it exists
-                                                    for i in range(len(timeline) - 1, -1, -1):
-                                                        if timeline[i]['type'] == 'thinking':
-                                                            timeline[i]['content'] = clean_thinking.strip()
-                                                            break
-                                                else:
-                                                    thinking_updates.append(clean_thinking)
-                                                    timeline.append({'type': 'thinking', 'content': clean_thinking.strip()})
-                                                self._update_slack_with_thinking(planning_updates, thinking_updates)
-                                        else:
-                                            # Handle streaming text fragments (preserve spacing from API)
-                                            clean_text = thinking_text.replace('<thinking>', '').replace('</thinking>', '')
-                                            if clean_text:
-                                                # Check content_index to handle multiple thinking streams
-                                                content_index = json_data.get('content_index', 0)
-                                                
-                                                # Ensure we have enough thinking slots
-                                                while len(thinking_updates) <= content_index:
-                                                    thinking_updates.append("")
-                                                
-                                                # For streaming, print text directly
-                                                if not thinking_updates[content_index]:
-                                                    print(f"\nTHINKING: {clean_text}", end='', flush=True)
-                                                    # Add new thinking entry to timeline (strip leading/trailing whitespace)
-                                                    timeline.append({'type': 'thinking', 'content': clean_text.strip(), 'content_index': content_index})
-                                                else:
-                                                    print(f"{clean_text}", end='', flush=True)
-                                                
-                                                # Accumulate text exactly as provided by the API (spacing is correct)
-                                                thinking_updates[content_index] += clean_text
-                                                
-                                                # Update the timeline entry for this content_index
-                                                for i in range(len(timeline) - 1, -1, -1):
-                                                    if (timeline[i]['type'] == 'thinking' and 
-                                                        timeline[i].get('content_index') == content_index):
-                                                        timeline[i]['content'] = thinking_updates[content_index].strip()
-                                                        break
-                                                
-                                                self._update_slack_with_thinking(planning_updates, thinking_updates)
-                                    continue
-                                
-                                elif current_event == 'response.thinking':
-                                    if 'text' in json_data:
-                                        thinking_text = json_data['text']
-                                        # Extract content from <thinking> tags
-                                        import re
-                                        thinking_match = re.search(r'<thinking>(.*?)</thinking>', thinking_text, re.DOTALL)
-                                        if thinking_match:
-                                            clean_thinking = thinking_match.group(1).strip()
-                                            if clean_thinking:
-                                                print(f"\n\nTHINKING COMPLETE: {clean_thinking}")
-                                                print("=" * 50)
-                                                # Use content_index to place in correct slot
-                                                content_index = json_data.get('content_index', 0)
-                                                
-                                                # Ensure we have enough thinking slots
-                                                while len(thinking_updates) <= content_index:
-                                                    thinking_updates.append("")
-                                                
-                                                # Replace the content at the correct index
-                                                thinking_updates[content_index] = clean_thinking
-                                                
-                                                # Update or add to timeline
-                                                timeline_updated = False
-                                                for i in range(len(timeline) - 1, -1, -1):
-                                                    if (timeline[i]['type'] == 'thinking' and 
-                                                        timeline[i].get('content_index') == content_index):
-                                                        timeline[i]['content'] = clean_thinking.strip()
-                                                        timeline_updated = True
-                                                        break
-                                                
-                                                if not timeline_updated:
-                                                    timeline.append({'type': 'thinking', 'content': clean_thinking.strip(), 'content_index': content_index})
-                                                
-                                                self._update_slack_with_thinking(planning_updates, thinking_updates)
-                                    continue
-                                
-                                # Handle final response event (new format)
-                                if current_event == 'response':
-                                    print(f"🎯 FINAL RESPONSE EVENT: Found final response data")
-                                    continue
-                                
-                                # Handle message deltas (streaming content)
-                                if json_data.get('object') == 'message.delta':
-                                    delta = json_data.get('delta', {})
-                                    
-                                    # Display thinking/planning text as it streams
-                                    # Note: response.text.delta contains the final answer delta with SQL results already included
-                                    if 'content' in delta:
-                                        for content_item in delta['content']:
-                                            if content_item.get('type') == 'text':
-                                                text_delta = content_item.get('text', '')
-                                                if text_delta:
-                                                    current_thinking += text_delta
-                                                    # Only show first part as thinking
-                                                    if len(current_thinking) < 200:
-                                                        if DEBUG:
-                                                            print(f"🧠 {text_delta}", end='', flush=True)
-                                            
-                                            elif content_item.get('type') == 'tool_use':
-                                                tool_data = content_item.get('tool_use', {})
-                                                tool_name = tool_data.get('name', 'unknown')
-                                                if tool_name not in tools_used:
-                                                    tools_used.append(tool_name)
-                                                    if DEBUG:
-                                                        print(f"\n🔧 USING TOOL: {tool_name}")
-                                                    planning_updates.append(f"Using {tool_name}")
-                                                    timeline.append({'type': 'status', 'content': f"Using {tool_name}"})
-                                                    
-                                                    # Show tool parameters if available
-                                                    if 'input' in tool_data:
-                                                        tool_input = tool_data['input']
-                                                        if isinstance(tool_input, dict):
-                                                            for key, value in tool_input.items():
-                                                                if isinstance(value, str) and len(value) < 100:
-                                                                    if DEBUG:
-                                                                        print(f"   📝 {key}: {value}")
-                                            
-                                            elif content_item.get('type') == 'tool_result':
-                                                if DEBUG:
-                                                    print(f"✅ Tool execution completed")
-                                                
-                                                # Check for verification information in tool result
-                                                tool_result = content_item.get('tool_result', {})
-                                                if tool_result:
-                                                    # Check for verification fields (debug only)
-                                                    if DEBUG and 'verification' in tool_result:
-                                                        print(f"   🔍 Verification: {tool_result['verification']}")
-                                                    if DEBUG and 'validated' in tool_result:
-                                                        print(f"   ✅ Validated: {tool_result['validated']}")
-                                                    if DEBUG and 'query_verified' in tool_result:
-                                                        print(f"   🎯 Query Verified: {tool_result['query_verified']}")
-                                                    if DEBUG and 'verified_query_used' in tool_result:
-                                                        print(f"   ✅ Verified Query Used: {tool_result['verified_query_used']}")
-                                                    if DEBUG and 'query_validation' in tool_result:
-                                                        print(f"   📋 Query Validation: {tool_result['query_validation']}")
-                                                    
-                                                    # Also check nested JSON content (debug only)
-                                                    if DEBUG and isinstance(tool_result, dict) and 'json' in tool_result:
-                                                        json_data = tool_result['json']
-                                                        if 'verification' in json_data:
-                                                            print(f"   🔍 JSON Verification: {json_data['verification']}")
-                                                        if 'validated' in json_data:
-                                                            print(f"   ✅ JSON Validated: {json_data['validated']}")
-                                                        if 'query_verified' in json_data:
-                                                            print(f"   🎯 JSON Query Verified: {json_data['query_verified']}")
-                                                        if 'verified_query_used' in json_data:
-                                                            print(f"   ✅ JSON Verified Query Used: {json_data['verified_query_used']}")
-                                
-                                # Handle objects without explicit type (status updates, tool metadata)
-                                elif json_data.get('object') is None:
-                                    if 'status' in json_data:
-                                        status = json_data.get('status', '')
-                                        status_msg = json_data.get('status_message', '')
-                                        if status and status not in ['REASONING_AGENT_STOP']:  # Filter noise
-                                            if DEBUG:
-                                                print(f"\n🔹 STATUS: {status.replace('_', ' ').title()}")
-                                                if status_msg:
-                                                    print(f"   📝 {status_msg}")
-                                            
-                                            # Always append status messages for Slack updates (regardless of DEBUG)
-                                            if status_msg:
-                                                planning_updates.append(status_msg)
-                                                timeline.append({'type': 'status', 'content': status_msg})
-                                                
-                                                # Update planning message with new steps (keep collapsed by default)
-                                                if self.slack_app and self.planning_message_ts and len(planning_updates) % 2 == 0:  # Every 2nd update
-                                                    try:
-                                                        # Update the existing planning message with current step count
-                                                        step_count = len(planning_updates)
-                                                        latest_step = planning_updates[-1] if planning_updates else "Processing..."
-                                                        
-                                                        channel = getattr(self.slack_app, '_channel_id', None)
-                                                        if channel:
-                                                            self.slack_app.client.chat_update(
-                                                                channel=channel,
-                                                                ts=self.planning_message_ts,
-                                                                text="🤔 Planning the next steps...",
-                                                                blocks=[
-                                                                    {
-                                                                        "type": "section",
-                                                                        "text": {
-                                                                            "type": "mrkdwn",
-                                                                            "text": f"*🤔 Planning the next steps...* ({step_count} steps)\n\n_Latest: {latest_step}_"
-                                                                        }
-                                                                    },
-                                                                    {
-                                                                        "type": "actions",
-                                                                        "elements": [
-                                                                            {
-                                                                                "type": "button",
-                                                                                "text": {
-                                                                                    "type": "plain_text",
-                                                                                    "text": "📋 Show Details"
-                                                                                },
-                                                                                "action_id": "show_planning_details",
-                                                                                "value": "show"
-                                                                            }
-                                                                        ]
-                                                                    }
-                                                                ]
-                                                            )
-                                                    except Exception as e:
-                                                        if DEBUG:
-                                                            print(f"Failed to update planning message: {e}")
-                                                        # Fallback to new message
-                                                        if self.slack_say:
-                                                            latest_updates = planning_updates[-3:]
-                                                            update_text = "\n".join(f"• {update}" for update in latest_updates)
-                                                            self.slack_say(
-                                                                text="🔄 Agent working...",
-                                                                blocks=[
-                                                                    {
-                                                                        "type": "section",
-                                                                        "text": {
-                                                                            "type": "mrkdwn",
-                                                                            "text": f"*🔄 Progress Update:*\n{update_text}"
-                                                                        }
-                                                                    }
-                                                                ]
-                                                            )
-                                    
-                                    # Display tool metadata if present
-                                    if 'tool_metadata' in json_data:
-                                        tool_meta = json_data['tool_metadata']
-                                        if DEBUG:
-                                            print(f"\n🔧 TOOL METADATA:")
-                                            if isinstance(tool_meta, dict):
-                                                for key, value in tool_meta.items():
-                                                    print(f"   📋 {key}: {value}")
-                                            
-                            except json.JSONDecodeError:
-                                pass
-            
-            # Parse response with CortexResponseParser
-            has_sse_data = any(line.startswith('data: ') for line in response_lines)
-            
-            if has_sse_data:
-                parsed_response = self.parser.parse_sse_response(response_lines)
-            else:
-                parsed_response = self.parser.parse_json_response('\n'.join(response_lines))
-            
-            # Extract summary for business display
-            summary = self.parser.extract_summary(parsed_response)
-            
-            # Display the complete final response
-            final_text = summary.get('text', '')
-            if final_text:
-                print(f"\n\n{'='*80}")
-                print("FINAL RESPONSE:")
-                print(f"{'='*80}")
-                print(final_text)
-                print(f"{'='*80}")
-            
-            # Store data for collapsible planning details
-            self.planning_steps = planning_updates
-            # Filter out empty thinking content for details display
-            self.thinking_steps = [content.strip() for content in thinking_updates if content and content.strip()]
-            # Store chronological timeline for proper ordering
-            self.timeline = timeline
-            self.sql_queries = summary.get('sql_queries', [])
-            self.verification_info = summary.get('verification_info', {})
-            self.verified_query_used = summary.get('verified_query_used', False)
-            
-            # Update planning message to show completion (now that summary data is available)
-            if planning_updates:
-                # Try to update the existing planning message first
-                if self.slack_app and self.planning_message_ts:
-                    try:
-                        step_count = len(planning_updates)
-                        
-                        # Build summary with additional info using the summary data
-                        additional_info = []
-                        try:
-                            has_verification = summary.get('verification_info') or summary.get('verified_query_used')
-                            sql_queries = summary.get('sql_queries', [])
-                            
-                            if has_verification:                                
-                                additional_info.append(":verified: answer accuracy verified by agent owner")
-                            elif sql_queries:
-                                # Only SQL queries
-                                query_count = len(sql_queries)
-                                additional_info.append(f"{query_count} SQL {'query' if query_count == 1 else 'queries'}")
-                        except:
-                            pass
-                        
-                        summary_text = f"_Finished {step_count} steps"
-                        if additional_info:
-                            summary_text += f" • Includes {' and '.join(additional_info)}"
-                        summary_text += "_"
-                        
-                        if self.planning_channel:
-                            self.slack_app.client.chat_update(
-                                channel=self.planning_channel,
-                                ts=self.planning_message_ts,
-                                text="✅ Thinking completed!",
-                                blocks=[
-                                    {
-                                        "type": "section",
-                                        "text": {
-                                            "type": "mrkdwn",
-                                            "text": f"*🤔 Thinking...* ✅ *Completed!*\n\n{summary_text}"
-                                        }
-                                    },
-                                    {
-                                        "type": "actions",
-                                        "elements": [
+                                # Update the existing planning message with current step count
+                                step_count = len(planning_updates)
+                                latest_step = planning_updates[-1] if planning_updates else "Processing..."
+
+                                channel = self.planning_channel
+                                if channel:
+                                    self._section_block["text"]["text"] = f"*🤔 Planning the next steps...* ({step_count} steps)\n\n_Latest: {latest_step}_"
+                                    self._post_slack_update(
+                                        channel=channel,
+                                        ts=self.planning_message_ts,
+                                        text="🤔 Planning the next steps...",
+                                        blocks=self._planning_blocks
+                                    )
+                            except Exception as e:
+                                if DEBUG:
+                                    print(f"Failed to update planning message: {e}")
+                                # Fallback to new message
+                                if self.slack_say:
+                                    latest_updates = planning_updates[-3:]
+                                    update_text = "\n".join(f"• {update}" for update in latest_updates)
+                                    self.slack_say(
+                                        text="🔄 Agent working...",
+                                        blocks=[
                                             {
-                                                "type": "button",
+                                                "type": "section",
                                                 "text": {
-                                                    "type": "plain_text",
-                                                    "text": "📋 Show Details"
-                                                },
-                                                "action_id": "show_planning_details",
-                                                "value": "show"
+                                                    "type": "mrkdwn",
+                                                    "text": f"*🔄 Progress Update:*\n{update_text}"
+                                                }
                                             }
                                         ]
+                                    )
+
+            # Display tool metadata if present
+            if 'tool_metadata' in json_data:
+                tool_meta = json_data['tool_metadata']
+                if DEBUG:
+                    print(f"\n🔧 TOOL METADATA:")
+                    if isinstance(tool_meta, dict):
+                        for key, value in tool_meta.items():
+                            print(f"   📋 {key}: {value}")
+
+    # SSE event state machine: the handler is selected once per 'event: ' line,
+    # so each following 'data: ' frame costs one call instead of a chain of
+    # current_event string comparisons.
+    _EVENT_HANDLERS = {
+        'response.status': _on_status_event,
+        'response.thinking.delta': _on_thinking_delta_event,
+        'response.thinking': _on_thinking_event,
+        'response': _on_response_event,
+    }
+
+    def _process_stream_line(self, line, state: dict) -> bool:
+        """Process one raw SSE line, updating state and Slack. Returns False on [DONE]."""
+        state['line_count'] += 1
+        if not line:
+            return True
+
+        # Work on raw bytes: checking prefixes and slicing without decoding avoids
+        # allocating a str per SSE frame.
+
+        # Check for event type first
+        if line[:7] == b'event: ':
+            state['saw_sse'] = True
+            current_event = line[7:].strip().decode('utf-8')
+            state['current_event'] = current_event
+            state['event_handler'] = self._EVENT_HANDLERS.get(current_event, CortexChat._on_other_event)
+            return True
+
+        if line[:6] == b'data: ':
+            state['saw_sse'] = True
+            data_content = line[6:].strip()
+
+            if data_content == b'[DONE]':
+                if DEBUG:
+                    print("\n✅ AGENT PROCESSING COMPLETE")
+                return False
+            elif data_content[:1] == b'{':
+                # Cheap pre-check: only frames that can be JSON objects reach the
+                # parser, so heartbeat/comment frames never pay the cost of a
+                # raised-and-swallowed decode exception.
+                try:
+                    json_data = orjson.loads(data_content)
+
+                    # Feed the parsed frame straight to the response parser so the
+                    # stream never has to be buffered and re-parsed at the end.
+                    self.parser.feed_sse_event(state['current_event'], json_data, state['parser_stream'])
+
+                    state['event_handler'](self, json_data, state)
+
+                except ValueError:
+                    # Covers JSONDecodeError from both orjson and the json fallback
+                    pass
+
+        elif not state['saw_sse']:
+            # No SSE framing seen yet: buffer in case this is a plain JSON response
+            state['json_fallback_lines'].append(line)
+
+        return True
+
+    def _finalize_stream(self, state: dict) -> dict:
+        """Parse the collected stream, send the completion update, and return the summary."""
+        planning_updates = state['planning_updates']
+        thinking_updates = state['thinking_updates']
+
+        # The stream is over: deliver whatever update the debounce was holding
+        # back, then drain the worker queue before sending the completion
+        # update directly below — otherwise a stale in-flight "Thinking..."
+        # write could land after it and overwrite the final message. The
+        # single-worker executor runs FIFO, so waiting on one trailing future
+        # orders everything submitted before it.
+        barrier = self._flush_slack_update()
+        if barrier is None:
+            barrier = self._slack_executor.submit(lambda: None)
+        barrier.result()
+
+        # SSE frames were fed to the parser as they arrived, so there is nothing
+        # to re-parse here; only plain JSON responses were buffered.
+        if state['saw_sse']:
+            parsed_response = self.parser.end_sse_stream(state['parser_stream'])
+        else:
+            parsed_response = self.parser.parse_json_response(
+                b'\n'.join(state['json_fallback_lines']).decode('utf-8'))
+
+        # Extract summary for business display
+        summary = self.parser.extract_summary(parsed_response)
+
+        # Display the complete final response
+        final_text = summary.get('text', '')
+        if final_text:
+            print(f"\n\n{'='*80}")
+            print("FINAL RESPONSE:")
+            print(f"{'='*80}")
+            print(final_text)
+            print(f"{'='*80}")
+
+        # Store data for collapsible planning details
+        self.planning_steps = planning_updates
+        # Filter out empty thinking content for details display
+        self.thinking_steps = [content.strip() for content in thinking_updates if content and content.strip()]
+        # Store chronological timeline for proper ordering
+        self.timeline = state['timeline']
+        self.sql_queries = summary.get('sql_queries', [])
+        self.verification_info = summary.get('verification_info', {})
+        self.verified_query_used = summary.get('verified_query_used', False)
+
+        # Update planning message to show completion (now that summary data is available)
+        if planning_updates:
+            # Try to update the existing planning message first
+            if self.slack_app and self.planning_message_ts:
+                try:
+                    step_count = len(planning_updates)
+
+                    # Build summary with additional info using the summary data
+                    additional_info = []
+                    try:
+                        has_verification = summary.get('verification_info') or summary.get('verified_query_used')
+                        sql_queries = summary.get('sql_queries', [])
+
+                        if has_verification:
+                            additional_info.append(":verified: answer accuracy verified by agent owner")
+                        elif sql_queries:
+                            # Only SQL queries
+                            query_count = len(sql_queries)
+                            additional_info.append(f"{query_count} SQL {'query' if query_count == 1 else 'queries'}")
+                    except:
+                        pass
+
+                    summary_text = f"_Finished {step_count} steps"
+                    if additional_info:
+                        summary_text += f" • Includes {' and '.join(additional_info)}"
+                    summary_text += "_"
+
+                    if self.planning_channel:
+                        self.slack_app.client.chat_update(
+                            channel=self.planning_channel,
+                            ts=self.planning_message_ts,
+                            text="✅ Thinking completed!",
+                            blocks=[
+                                {
+                                    "type": "section",
+                                    "text": {
+                                        "type": "mrkdwn",
+                                        "text": f"*🤔 Thinking...* ✅ *Completed!*\n\n{summary_text}"
                                     }
-                                ]
-                            )
-                            print(f"✅ Updated completion message with summary info")
-                        else:
-                            raise Exception("No channel available")
-                    except Exception as e:
-                        if DEBUG:
-                            print(f"Failed to update completion message: {e}")
-                        # Fallback to new message
-                        if self.slack_say:
-                            all_updates = "\n".join(f"• {update}" for update in planning_updates)
-                            self.slack_say(
-                                text="✅ Thinking completed!",
-                                blocks=[
-                                    {
-                                        "type": "section",
-                                        "text": {
-                                            "type": "mrkdwn",
-                                            "text": f"*🤔 Thinking...* ✅ *Completed!*\n\n{all_updates}"
+                                },
+                                {
+                                    "type": "actions",
+                                    "elements": [
+                                        {
+                                            "type": "button",
+                                            "text": {
+                                                "type": "plain_text",
+                                                "text": "📋 Show Details"
+                                            },
+                                            "action_id": "show_planning_details",
+                                            "value": "show"
                                         }
+                                    ]
+                                }
+                            ]
+                        )
+                        print(f"✅ Updated completion message with summary info")
+                    else:
+                        raise Exception("No channel available")
+                except Exception as e:
+                    if DEBUG:
+                        print(f"Failed to update completion message: {e}")
+                    # Fallback to new message
+                    if self.slack_say:
+                        all_updates = "\n".join(f"• {update}" for update in planning_updates)
+                        self.slack_say(
+                            text="✅ Thinking completed!",
+                            blocks=[
+                                {
+                                    "type": "section",
+                                    "text": {
+                                        "type": "mrkdwn",
+                                        "text": f"*🤔 Thinking...* ✅ *Completed!*\n\n{all_updates}"
                                     }
-                                ]
-                            )
-                # Fallback to new message if no app available
-                elif self.slack_say:
-                    all_updates = "\n".join(f"• {update}" for update in planning_updates)
-                    self.slack_say(
-                        text="✅ Thinking completed!",
-                        blocks=[
-                            {
-                                "type": "section",
-                                "text": {
-                                    "type": "mrkdwn",
-                                    "text": f"*🤔 Thinking...* ✅ *Completed!*\n\nFinished {len(planning_updates)} steps"
                                 }
+                            ]
+                        )
+            # Fallback to new message if no app available
+            elif self.slack_say:
+                all_updates = "\n".join(f"• {update}" for update in planning_updates)
+                self.slack_say(
+                    text="✅ Thinking completed!",
+                    blocks=[
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": f"*🤔 Thinking...* ✅ *Completed!*\n\nFinished {len(planning_updates)} steps"
                             }
-                        ]
-                    )
-            
-            # Log verification information (debug only)
-            if DEBUG and (summary.get('verification_info') or summary.get('verified_query_used')):
-                print(f"\n🔍 VERIFICATION SUMMARY:")
-                print(f"   🔹 Verified Query Used: {'✅ YES' if summary.get('verified_query_used') else '❌ NO'}")
-                
-                verification_info = summary.get('verification_info', {})
-                if verification_info:
-                    print(f"   📋 Verification Details:")
-                    for key, value in verification_info.items():
-                        print(f"      • {key}: {value}")
-                else:
-                    print(f"   📋 No detailed verification info available")
-            elif DEBUG:
-                print(f"\n🔍 VERIFICATION SUMMARY: No verification information found")
-            
-            return summary
-            
+                        }
+                    ]
+                )
+
+        # Log verification information (debug only)
+        if DEBUG and (summary.get('verification_info') or summary.get('verified_query_used')):
+            print(f"\n🔍 VERIFICATION SUMMARY:")
+            print(f"   🔹 Verified Query Used: {'✅ YES' if summary.get('verified_query_used') else '❌ NO'}")
+
+            verification_info = summary.get('verification_info', {})
+            if verification_info:
+                print(f"   📋 Verification Details:")
+                for key, value in verification_info.items():
+                    print(f"      • {key}: {value}")
+            else:
+                print(f"   📋 No detailed verification info available")
+        elif DEBUG:
+            print(f"\n🔍 VERIFICATION SUMMARY: No verification information found")
+
+        return summary
+
+    def _retrieve_response(self, query: str, limit=1) -> dict[str, any]:
+        """Enhanced response retrieval with real-time streaming and planning display."""
+
+        payload = self._build_payload(query)
+        headers = self._build_headers()
+
+        # Debug: Print the request details
+        if DEBUG:
+            print(f"🔍 Making request to: {self.agent_url}")
+            print(f"🔍 Headers: {headers}")
+            print(f"🔍 Payload: {json.dumps(payload, indent=2)}")
+
+        try:
+            # Make streaming request on the pooled keep-alive session
+            response = self._session.post(
+                self.agent_url,
+                headers=headers,
+                data=orjson.dumps(payload),
+                timeout=120,
+                stream=True
+            )
+            response.raise_for_status()
+
+            state = self._begin_stream()
+
+            # 64 KiB reads: large enough to amortize recv() and per-chunk Python
+            # overhead on big tool_result payloads, small enough to keep memory flat.
+            for line in response.iter_lines(chunk_size=65536, decode_unicode=False):
+                if not self._process_stream_line(line, state):
+                    break
+
+            return self._finalize_stream(state)
+
         except requests.exceptions.Timeout:
             print(f"🔍 Timeout error caught")
             return self._handle_error("Request took longer than 120 seconds", "Request timeout")
@@ -569,6 +854,91 @@ class CortexChat:
             print(f"🔍 General exception caught: {type(e).__name__}: {e}")
             return self._handle_error(f"Unexpected error: {e}", "Unexpected error")
 
+    @classmethod
+    def _get_aio_session(cls):
+        """Get (or create) the shared aiohttp session for the running event loop."""
+        loop = asyncio.get_running_loop()
+        session = cls._aio_sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=16))
+            cls._aio_sessions[loop] = session
+        return session
+
+    @classmethod
+    async def _close_aio_session(cls):
+        """Close the shared aiohttp session for the running event loop, if any."""
+        session = cls._aio_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def _retrieve_response_async(self, query: str, limit=1) -> dict[str, any]:
+        """Async variant of _retrieve_response using aiohttp.
+
+        Slack chat_update calls go through the background update worker, so the
+        round-trip to Slack overlaps with draining the SSE stream instead of
+        blocking it.
+        """
+        payload = self._build_payload(query)
+        headers = self._build_headers()
+
+        if DEBUG:
+            print(f"🔍 Making request to: {self.agent_url}")
+            print(f"🔍 Headers: {headers}")
+            print(f"🔍 Payload: {json.dumps(payload, indent=2)}")
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            session = self._get_aio_session()
+            async with session.post(
+                self.agent_url,
+                headers=headers,
+                data=orjson.dumps(payload),
+                timeout=aiohttp.ClientTimeout(total=120)
+            ) as response:
+                response.raise_for_status()
+
+                state = await loop.run_in_executor(None, self._begin_stream)
+
+                # Read raw chunks and split lines ourselves: aiohttp's line
+                # iterator raises ValueError on any line larger than its read
+                # buffer, and data: frames carrying big tool results routinely
+                # exceed 64 KiB. Slack updates are offloaded to the worker
+                # thread by _post_slack_update, so this loop never waits on
+                # Slack RTT.
+                buffer = b''
+                done = False
+                async for chunk in response.content.iter_chunked(65536):
+                    buffer += chunk
+                    while not done:
+                        newline = buffer.find(b'\n')
+                        if newline < 0:
+                            break
+                        line = buffer[:newline].rstrip(b'\r')
+                        buffer = buffer[newline + 1:]
+                        if not self._process_stream_line(line, state):
+                            done = True
+                    if done:
+                        break
+                if not done and buffer:
+                    self._process_stream_line(buffer.rstrip(b'\r'), state)
+
+                return await loop.run_in_executor(None, self._finalize_stream, state)
+
+        except asyncio.TimeoutError:
+            print(f"🔍 Timeout error caught")
+            return self._handle_error("Request took longer than 120 seconds", "Request timeout")
+        except aiohttp.ClientResponseError as e:
+            print(f"🔍 ClientResponseError caught: {e}")
+            print(f"🔍 Response status code: {e.status}")
+            return self._handle_error(f"Request error: {e}", "Request failed")
+        except aiohttp.ClientError as e:
+            print(f"🔍 ClientError caught: {e}")
+            return self._handle_error(f"Request error: {e}", "Request failed")
+        except Exception as e:
+            print(f"🔍 General exception caught: {type(e).__name__}: {e}")
+            return self._handle_error(f"Unexpected error: {e}", "Unexpected error")
+
     def _handle_error(self, error_msg: str, slack_title: str) -> dict:
         """Helper method to handle errors consistently."""
         if DEBUG:
@@ -586,21 +956,22 @@ class CortexChat:
     def set_slack_say_function(self, slack_say_function):
         """Set the Slack say function for real-time updates."""
         self.slack_say = slack_say_function
-    
+
     def set_slack_app(self, slack_app, channel_id=None):
         """Set the Slack app and channel for message updates."""
         self.slack_app = slack_app
+        self._prepare_slack_update_headers()
         if channel_id:
             # Handle both channel ID string and channel object
             if isinstance(channel_id, dict):
                 channel_id = channel_id.get('id', channel_id)
-            setattr(slack_app, '_channel_id', channel_id)
-    
+            self._channel_id = channel_id
+
     def _smart_truncate(self, text, max_length=200, suffix="..."):
         """Smart truncation that preserves word and sentence boundaries."""
         if len(text) <= max_length:
             return text
-        
+
         # Try sentence boundary first
         sentences = text.split('. ')
         if len(sentences) > 1:
@@ -613,7 +984,7 @@ class CortexChat:
                     break
             if result.strip():
                 return result.strip() + suffix
-        
+
         # Try word boundary
         words = text.split()
         result = ""
@@ -623,23 +994,23 @@ class CortexChat:
                 result = test
             else:
                 break
-        
+
         return result.strip() + suffix if result.strip() else text[:max_length-len(suffix)] + suffix
 
     def _update_slack_with_thinking(self, planning_updates, thinking_updates):
         """Update Slack with combined planning and thinking updates in real-time."""
         if not (self.slack_app and self.planning_message_ts and self.planning_channel):
             return
-            
+
         try:
             # Build appended status list (show recent status updates)
             status_lines = []
-            
+
             # Show last 8 status updates to keep it manageable
             recent_statuses = planning_updates[-8:] if planning_updates else []
             for status in recent_statuses:
                 status_lines.append(f"• {status}")
-            
+
             # Add thinking content from all content indices
             if thinking_updates:
                 # Combine all non-empty thinking content
@@ -647,7 +1018,7 @@ class CortexChat:
                 for thinking_content in thinking_updates:
                     if thinking_content and thinking_content.strip():
                         all_thinking.append(thinking_content.strip())
-                
+
                 if all_thinking:
                     # Use the most recent thinking content
                     latest_thinking = all_thinking[-1]
@@ -658,55 +1029,59 @@ class CortexChat:
                     else:
                         thinking_line = f"• {latest_thinking}"
                     status_lines.append(thinking_line)
-            
+
             # Create the status progression text
             if status_lines:
                 progress_text = "\n".join(status_lines)
                 summary_text = f"*🤔 Thinking...*\n\n{progress_text}"
-                
+
                 # Ensure we don't exceed Slack message limits (3000 chars is Slack's limit)
                 if len(summary_text) > 2900:
                     # If too long, show fewer status updates
                     recent_statuses = planning_updates[-4:] if planning_updates else []
                     status_lines = [f"• {status}" for status in recent_statuses]
-                    
+
                     # Add thinking if available
                     if thinking_updates:
                         latest_thinking = thinking_updates[-1]
                         truncated_thinking = self._smart_truncate(latest_thinking, max_length=200)
                         status_lines.append(f"• {truncated_thinking}")
-                    
+
                     progress_text = "\n".join(status_lines)
                     summary_text = f"*🤔 Thinking...*\n\n{progress_text}"
             else:
                 summary_text = "*🤔 Thinking...* Processing..."
-            
-            blocks = [
-                {
-                    "type": "section", 
-                    "text": {
-                        "type": "mrkdwn",
-                        "text": summary_text
-                    }
-                }
-            ]
-            
-            self.slack_app.client.chat_update(
+
+            self._section_block["text"]["text"] = summary_text
+
+            self._post_slack_update(
                 channel=self.planning_channel,
                 ts=self.planning_message_ts,
-                blocks=blocks
+                blocks=self._section_blocks
             )
-            
+
         except Exception as e:
-            print(f"❌ Error updating Slack with thinking: {e}")
+            logger.warning("❌ Error updating Slack with thinking: %s", e)
         if DEBUG:
                 import traceback
                 print(f"❌ Full error: {traceback.format_exc()}")
 
+    async def achat(self, query: str) -> dict[str, any]:
+        """
+        Async chat entry point for callers running their own event loop.
+        Returns: dict with keys: 'text', 'sql_queries', 'citations', 'suggestions', etc.
+        """
+        return await self._retrieve_response_async(query)
+
     def chat(self, query: str) -> dict[str, any]:
         """
         Enhanced chat method with real-time streaming and planning display.
         Returns: dict with keys: 'text', 'sql_queries', 'citations', 'suggestions', etc.
+
+        Uses the pooled sync session: spinning up an event loop per call would
+        tear down the aiohttp session each time and forfeit connection reuse.
+        Callers with a long-lived loop should use achat(), where the per-loop
+        session cache actually amortizes.
         """
         result = self._retrieve_response(query)
         return result
@@ -201,103 +201,109 @@ class CortexResponseParser:
     def __init__(self, debug: bool = False):
         self.debug = debug
     
-    def parse_sse_response(self, sse_lines: List[str]) -> CortexResponse:
+    def begin_sse_stream(self) -> Dict[str, Any]:
         """
-        Parse Server-Sent Events (SSE) streaming response.
-        
+        Start an incremental SSE parse.
+
+        Feed each decoded data frame with feed_sse_event() as it arrives, then
+        call end_sse_stream() to get the assembled CortexResponse. This avoids
+        buffering the full stream and re-parsing it at the end.
+
+        Returns:
+            Stream state dictionary to pass to feed_sse_event/end_sse_stream
+        """
+        return {
+            'response': CortexResponse(),
+            'accumulated_content': {'text': '', 'tool_use': [], 'tool_results': []},
+            'accumulated_thinking': [],  # Store thinking content
+        }
+
+    def feed_sse_event(self, event: Optional[str], json_data: Dict[str, Any], stream: Dict[str, Any]):
+        """
+        Feed one already-parsed SSE data frame into an incremental parse.
+
         Args:
-            sse_lines: List of SSE lines from the response
-            
+            event: The SSE event name from the preceding 'event: ' line (or None)
+            json_data: The parsed JSON payload of the 'data: ' line
+            stream: Stream state from begin_sse_stream
+        """
+        response = stream['response']
+        accumulated_content = stream['accumulated_content']
+        accumulated_thinking = stream['accumulated_thinking']
+
+        # Handle thinking events
+        if event == 'response.thinking.delta' or event == 'response.thinking':
+            if 'text' in json_data:
+                thinking_text = json_data['text']
+                # Extract content from <thinking> tags
+                thinking_match = re.search(r'<thinking>(.*?)</thinking>', thinking_text, re.DOTALL)
+                if thinking_match:
+                    clean_thinking = thinking_match.group(1).strip()
+                    if clean_thinking:
+                        accumulated_thinking.append(clean_thinking)
+
+        # Handle status events (planning steps)
+        elif event == 'response.status':
+            if 'message' in json_data:
+                status_msg = json_data['message']
+                response.status_messages.append(status_msg)
+
+        # Handle response text events (final answer content)
+        elif event == 'response.text.delta':
+            if 'text' in json_data:
+                text_content = json_data['text']
+                # Add text content as accumulated content (only from delta events to avoid duplication)
+                accumulated_content['text'] += text_content
+
+        elif event == 'response.text':
+            # Skip complete text events since we're building from deltas
+            # This prevents duplication from both delta and complete events
+            pass
+
+        # Handle tool result events (contains SQL queries and verification info)
+        elif event == 'response.tool_result':
+            if 'content' in json_data and 'tool_use_id' in json_data:
+                tool_result = {
+                    'tool_use_id': json_data['tool_use_id'],
+                    'content': json_data['content']
+                }
+                accumulated_content['tool_results'].append(tool_result)
+
+        # Also process using original logic for other content (but skip events we already handled)
+        # Skip text events that we already processed above to prevent duplication
+        parsed_line = self._classify_sse_data(json_data)
+
+        if event not in ['response.text.delta', 'response.text', 'response.thinking.delta', 'response.thinking', 'response.status']:
+            if parsed_line.get('type') == 'message':
+                content = parsed_line['content']
+                accumulated_content['text'] += content.get('text', '')
+                accumulated_content['tool_use'].extend(content.get('tool_use', []))
+                accumulated_content['tool_results'].extend(content.get('tool_results', []))
+
+        if parsed_line.get('type') == 'final_message':
+            # Skip final message content processing since we're already accumulating from delta events
+            # This prevents duplicate content in the final response
+            # Note: The final message contains the complete assembled content that we've already
+            # built up from individual response.text.delta events
+            for _entry in parsed_line.get("content", []):
+                if _entry.get("type") != "chart":
+                    continue
+                response.charts.append(_entry.get("chart"))
+
+    def end_sse_stream(self, stream: Dict[str, Any]) -> CortexResponse:
+        """
+        Finish an incremental SSE parse and assemble the CortexResponse.
+
+        Args:
+            stream: Stream state from begin_sse_stream
+
         Returns:
             CortexResponse object with parsed data
         """
-        response = CortexResponse()
-        accumulated_content = {'text': '', 'tool_use': [], 'tool_results': []}
-        accumulated_thinking = []  # Store thinking content
-        current_event = None
-        
-        for line in sse_lines:
-            # Track event types
-            if line.startswith('event: '):
-                current_event = line[7:].strip()
-                continue
-            
-            # Process data lines based on current event
-            if line.startswith('data: '):
-                data_content = line[6:].strip()
-                
-                if data_content == '[DONE]':
-                    break
-                
-                try:
-                    json_data = json.loads(data_content)
-                    
-                    # Handle thinking events
-                    if current_event == 'response.thinking.delta' or current_event == 'response.thinking':
-                        if 'text' in json_data:
-                            thinking_text = json_data['text']
-                            # Extract content from <thinking> tags
-                            import re
-                            thinking_match = re.search(r'<thinking>(.*?)</thinking>', thinking_text, re.DOTALL)
-                            if thinking_match:
-                                clean_thinking = thinking_match.group(1).strip()
-                                if clean_thinking:
-                                    accumulated_thinking.append(clean_thinking)
-                    
-                    # Handle status events (planning steps)
-                    elif current_event == 'response.status':
-                        if 'message' in json_data:
-                            status_msg = json_data['message']
-                            response.status_messages.append(status_msg)
-                    
-                    # Handle response text events (final answer content)
-                    elif current_event == 'response.text.delta':
-                        if 'text' in json_data:
-                            text_content = json_data['text']
-                            # Add text content as accumulated content (only from delta events to avoid duplication)
-                            accumulated_content['text'] += text_content
-                    
-                    elif current_event == 'response.text':
-                        # Skip complete text events since we're building from deltas
-                        # This prevents duplication from both delta and complete events
-                        pass
-                    
-                    # Handle tool result events (contains SQL queries and verification info)
-                    elif current_event == 'response.tool_result':
-                        if 'content' in json_data and 'tool_use_id' in json_data:
-                            tool_result = {
-                                'tool_use_id': json_data['tool_use_id'],
-                                'content': json_data['content']
-                            }
-                            accumulated_content['tool_results'].append(tool_result)
-                    
-                except json.JSONDecodeError:
-                    pass
-            
-            # Also process using original logic for other content (but skip events we already handled)
-            # Skip text events that we already processed above to prevent duplication
-            parsed_line = self._process_sse_line(line)
-            
-            if current_event not in ['response.text.delta', 'response.text', 'response.thinking.delta', 'response.thinking', 'response.status']:
-                if parsed_line.get('type') == 'message':
-                    content = parsed_line['content']
-                    accumulated_content['text'] += content.get('text', '')
-                    accumulated_content['tool_use'].extend(content.get('tool_use', []))
-                    accumulated_content['tool_results'].extend(content.get('tool_results', []))
-            
-            if parsed_line.get('type') == 'final_message':
-                # Skip final message content processing since we're already accumulating from delta events
-                # This prevents duplicate content in the final response
-                # Note: The final message contains the complete assembled content that we've already 
-                # built up from individual response.text.delta events
-                for _entry in parsed_line.get("content", []):
-                    if _entry.get("type") != "chart":
-                        continue
-                    response.charts.append(_entry.get("chart"))
-            
-            elif parsed_line.get('type') == 'done':
-                break
-        
+        response = stream['response']
+        accumulated_content = stream['accumulated_content']
+        accumulated_thinking = stream['accumulated_thinking']
+
         # Add thinking content as separate messages FIRST
         for thinking_text in accumulated_thinking:
             if thinking_text.strip():
@@ -305,23 +311,23 @@ class CortexResponseParser:
                     role='assistant',
                     content=[{'type': 'thinking', 'text': thinking_text}]
                 ))
-        
+
         # Convert accumulated content to message (this should be LAST so final_text picks it up)
-        if accumulated_content['text'] or accumulated_content['tool_use'] or accumulated_content['tool_results'] or response.chars:
+        if accumulated_content['text'] or accumulated_content['tool_use'] or accumulated_content['tool_results'] or response.charts:
             message_content = []
-            
+
             if accumulated_content['text']:
                 message_content.append({
                     'type': 'text',
                     'text': accumulated_content['text']
                 })
-            
+
             for tool_use in accumulated_content['tool_use']:
                 message_content.append({
                     'type': 'tool_use',
                     'tool_use': tool_use
                 })
-            
+
             for tool_result in accumulated_content['tool_results']:
                 message_content.append({
                     'type': 'tool_results',
@@ -333,13 +339,52 @@ class CortexResponseParser:
                     'type': 'text',
                     'text': json.dumps(chart),
                 })
-            
+
             response.messages.append(ParsedMessage(
                 role='assistant',
                 content=message_content
             ))
-        
+
         return response
+
+    def parse_sse_response(self, sse_lines: List[str]) -> CortexResponse:
+        """
+        Parse Server-Sent Events (SSE) streaming response.
+
+        Args:
+            sse_lines: List of SSE lines from the response
+
+        Returns:
+            CortexResponse object with parsed data
+        """
+        stream = self.begin_sse_stream()
+        current_event = None
+
+        for line in sse_lines:
+            # Track event types
+            if line.startswith('event: '):
+                current_event = line[7:].strip()
+                continue
+
+            # Process data lines based on current event
+            if line.startswith('data: '):
+                data_content = line[6:].strip()
+
+                if data_content == '[DONE]':
+                    break
+
+                if data_content.startswith('['):
+                    # Trace data, not message data
+                    continue
+
+                try:
+                    json_data = json.loads(data_content)
+                except json.JSONDecodeError:
+                    continue
+
+                self.feed_sse_event(current_event, json_data, stream)
+
+        return self.end_sse_stream(stream)
     
     def parse_json_response(self, json_data: Union[str, Dict[str, Any]]) -> CortexResponse:
         """
@@ -545,26 +590,29 @@ class CortexResponseParser:
                 return {'type': 'trace', 'data': json_str}
             
             data = json.loads(json_str)
-            
-            # Handle new format: final response with content array
-            if 'content' in data and 'role' in data and data.get('role') == 'assistant':
-                return {
-                    'type': 'final_message',
-                    'role': data['role'],
-                    'content': data['content']
-                }
-            
-            # Handle old format: message deltas
-            if data.get('object') == 'message.delta':
-                delta = data.get('delta', {})
-                if 'content' in delta:
-                    return {
-                        'type': 'message',
-                        'content': self._parse_delta_content(delta['content'])
-                    }
-            return {'type': 'other', 'data': data}
+            return self._classify_sse_data(data)
         except json.JSONDecodeError:
             return {'type': 'error', 'message': f'Failed to parse: {line}'}
+
+    def _classify_sse_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Classify an already-parsed SSE data payload."""
+        # Handle new format: final response with content array
+        if 'content' in data and 'role' in data and data.get('role') == 'assistant':
+            return {
+                'type': 'final_message',
+                'role': data['role'],
+                'content': data['content']
+            }
+
+        # Handle old format: message deltas
+        if data.get('object') == 'message.delta':
+            delta = data.get('delta', {})
+            if 'content' in delta:
+                return {
+                    'type': 'message',
+                    'content': self._parse_delta_content(delta['content'])
+                }
+        return {'type': 'other', 'data': data}
     
     def _parse_delta_content(self, content: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Parse different types of content from the delta."""
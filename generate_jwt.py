@@ -46,7 +46,8 @@ class JWTGenerator(object):
     ALGORITHM = "RS256"  # Tokens will be generated using RSA with SHA256
 
     def __init__(self, account: Text, user: Text, private_key_file_path: Text,
-                 lifetime: timedelta = LIFETIME, renewal_delay: timedelta = RENEWAL_DELTA):
+                 lifetime: timedelta = LIFETIME, renewal_delay: timedelta = RENEWAL_DELTA,
+                 private_key=None):
         """
         __init__ creates an object that generates JWTs for the specified user, account identifier, and private key.
         :param account: Your Snowflake account identifier. See https://docs.snowflake.com/en/user-guide/admin-account-identifier.html. Note that if you are using the account locator, exclude any region information from the account locator.
@@ -54,6 +55,7 @@ class JWTGenerator(object):
         :param private_key_file_path: Path to the private key file used for signing the JWTs.
         :param lifetime: The number of minutes (as a timedelta) during which the key will be valid.
         :param renewal_delay: The number of minutes (as a timedelta) from now after which the JWT generator should renew the JWT.
+        :param private_key: An already-loaded private key object. When provided, the file at private_key_file_path is not read, which skips the PEM parse on every instantiation.
         """
 
         logger.info(
@@ -72,6 +74,11 @@ class JWTGenerator(object):
         self.renew_time = datetime.now(timezone.utc)
         self.token = None
 
+        if private_key is not None:
+            # Reuse the caller's already-parsed key material.
+            self.private_key = private_key
+            return
+
         # Load the private key from the specified file.
         with open(self.private_key_file_path, 'rb') as pem_in:
             pemlines = pem_in.read()